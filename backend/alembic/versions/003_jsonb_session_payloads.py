@@ -0,0 +1,129 @@
+"""Store session answers, question order and result answers as JSONB
+
+Revision ID: 003_jsonb_session_payloads
+Revises: 002_add_test_result_id
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '003_jsonb_session_payloads'
+down_revision = '002_add_test_result_id'
+branch_labels = None
+depends_on = None
+
+
+JSON_ARRAY_COLUMNS = (
+    ('test_sessions', 'answers'),
+    ('test_sessions', 'question_order'),
+    ('test_results', 'answers'),
+)
+
+# Raw text of every value that was not a JSON array, kept so the backfill loses nothing.
+LEGACY_PAYLOADS_TABLE = 'legacy_json_payloads'
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # NULL when the text is not a JSON array; lives in this connection's temporary schema only.
+    op.execute(
+        """
+        CREATE FUNCTION pg_temp.as_json_array(value text) RETURNS jsonb
+        LANGUAGE plpgsql IMMUTABLE AS $$
+        DECLARE
+            parsed jsonb;
+        BEGIN
+            parsed := value::jsonb;
+            RETURN CASE WHEN jsonb_typeof(parsed) = 'array' THEN parsed END;
+        EXCEPTION WHEN data_exception THEN
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+
+    malformed = {
+        (table, column): bind.scalar(sa.text(
+            f"SELECT count(*) FROM {table} "
+            f"WHERE {column} IS NOT NULL AND pg_temp.as_json_array({column}) IS NULL"
+        ))
+        for table, column in JSON_ARRAY_COLUMNS
+    }
+    if any(malformed.values()):
+        op.create_table(LEGACY_PAYLOADS_TABLE,
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('table_name', sa.String(), nullable=False),
+            sa.Column('column_name', sa.String(), nullable=False),
+            sa.Column('row_id', sa.Integer(), nullable=False),
+            sa.Column('raw_value', sa.Text(), nullable=False),
+            sa.Column('migrated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    # Backfill: anything that is not a JSON array becomes an empty array so the cast cannot fail,
+    # after its raw text has been copied aside.
+    for table, column in JSON_ARRAY_COLUMNS:
+        if malformed[(table, column)]:
+            ids = bind.execute(sa.text(
+                f"INSERT INTO {LEGACY_PAYLOADS_TABLE} (table_name, column_name, row_id, raw_value) "
+                f"SELECT '{table}', '{column}', id, {column} FROM {table} "
+                f"WHERE {column} IS NOT NULL AND pg_temp.as_json_array({column}) IS NULL "
+                f"RETURNING row_id"
+            )).scalars().all()
+            logger.warning(
+                "%s.%s: %d value(s) that are not JSON arrays replaced with [] (ids %s); "
+                "raw text kept in %s",
+                table, column, len(ids), ", ".join(map(str, sorted(ids))), LEGACY_PAYLOADS_TABLE,
+            )
+        nulls = bind.execute(sa.text(f"UPDATE {table} SET {column} = '[]' WHERE {column} IS NULL")).rowcount
+        if nulls:
+            logger.info("%s.%s: %d NULL value(s) replaced with []", table, column, nulls)
+        op.execute(
+            f"UPDATE {table} SET {column} = '[]' "
+            f"WHERE pg_temp.as_json_array({column}) IS NULL"
+        )
+
+    # The text default cannot be cast automatically, drop it before changing the type
+    op.alter_column('test_sessions', 'answers', server_default=None)
+
+    for table, column in JSON_ARRAY_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=postgresql.JSONB(),
+            existing_nullable=False,
+            postgresql_using=f'{column}::jsonb',
+        )
+
+    op.alter_column('test_sessions', 'answers', server_default=sa.text("'[]'::jsonb"))
+
+
+def downgrade() -> None:
+    op.alter_column('test_sessions', 'answers', server_default=None)
+
+    for table, column in JSON_ARRAY_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=sa.Text(),
+            existing_nullable=False,
+            postgresql_using=f'{column}::text',
+        )
+
+    op.alter_column('test_sessions', 'answers', server_default='[]')
+
+    # Put back the raw text the upgrade replaced.
+    if sa.inspect(op.get_bind()).has_table(LEGACY_PAYLOADS_TABLE):
+        for table, column in JSON_ARRAY_COLUMNS:
+            op.execute(
+                f"UPDATE {table} SET {column} = legacy.raw_value "
+                f"FROM {LEGACY_PAYLOADS_TABLE} AS legacy "
+                f"WHERE legacy.table_name = '{table}' AND legacy.column_name = '{column}' "
+                f"AND legacy.row_id = {table}.id"
+            )
+        op.drop_table(LEGACY_PAYLOADS_TABLE)
@@ -0,0 +1,32 @@
+"""Add app_metadata key/value table
+
+Revision ID: 004_app_metadata
+Revises: 003_jsonb_session_payloads
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004_app_metadata'
+down_revision = '003_jsonb_session_payloads'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases bootstrapped with create_all may already have the table
+    if sa.inspect(op.get_bind()).has_table('app_metadata'):
+        return
+
+    op.create_table('app_metadata',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('value', sa.Text(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('app_metadata')
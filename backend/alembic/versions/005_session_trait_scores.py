@@ -0,0 +1,31 @@
+"""Add running trait_scores totals to test_sessions
+
+Revision ID: 005_session_trait_scores
+Revises: 004_app_metadata
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '005_session_trait_scores'
+down_revision = '004_app_metadata'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing sessions keep NULL and get their totals computed the next time they are loaded.
+    # Databases bootstrapped with create_all may already have the column.
+    if 'trait_scores' in {column['name'] for column in sa.inspect(op.get_bind()).get_columns('test_sessions')}:
+        return
+
+    op.add_column('test_sessions',
+        sa.Column('trait_scores', postgresql.JSONB(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('test_sessions', 'trait_scores')
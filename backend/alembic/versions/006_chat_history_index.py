@@ -0,0 +1,31 @@
+"""Add composite (user_id, timestamp, id) index for chat history pagination
+
+Revision ID: 006_chat_history_index
+Revises: 005_session_trait_scores
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006_chat_history_index'
+down_revision = '005_session_trait_scores'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases bootstrapped with create_all may already have the index
+    if 'ix_chat_messages_user_timestamp_id' in {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('chat_messages')}:
+        return
+
+    op.create_index(
+        'ix_chat_messages_user_timestamp_id',
+        'chat_messages',
+        ['user_id', 'timestamp', 'id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chat_messages_user_timestamp_id', table_name='chat_messages')
@@ -0,0 +1,54 @@
+"""Add the latest-personality projection to users and a (user_id, completed_at) index
+
+Revision ID: 007_latest_personality
+Revises: 006_chat_history_index
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007_latest_personality'
+down_revision = '006_chat_history_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # Databases bootstrapped with create_all may already have the columns and index
+    user_columns = {column['name'] for column in inspector.get_columns('users')}
+    if 'latest_personality_type' not in user_columns:
+        op.add_column('users', sa.Column('latest_personality_type', sa.String(), nullable=True))
+    if 'latest_result_at' not in user_columns:
+        op.add_column('users', sa.Column('latest_result_at', sa.DateTime(), nullable=True))
+
+    if 'ix_test_results_user_completed_at' not in {index['name'] for index in inspector.get_indexes('test_results')}:
+        op.create_index(
+            'ix_test_results_user_completed_at',
+            'test_results',
+            ['user_id', sa.text('completed_at DESC')],
+        )
+
+    op.execute(
+        """
+        UPDATE users
+        SET latest_personality_type = latest.personality_type,
+            latest_result_at = latest.completed_at
+        FROM (
+            SELECT DISTINCT ON (user_id) user_id, personality_type, completed_at
+            FROM test_results
+            ORDER BY user_id, completed_at DESC
+        ) AS latest
+        WHERE users.id = latest.user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_test_results_user_completed_at', table_name='test_results')
+    op.drop_column('users', 'latest_result_at')
+    op.drop_column('users', 'latest_personality_type')
@@ -0,0 +1,57 @@
+"""Add a version and the last answer's idempotency key to test_sessions, one result per session
+
+Revision ID: 008_session_versioning
+Revises: 007_latest_personality
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008_session_versioning'
+down_revision = '007_latest_personality'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # Databases bootstrapped with create_all may already have the columns and index
+    session_columns = {column['name'] for column in inspector.get_columns('test_sessions')}
+    if 'version' not in session_columns:
+        op.add_column('test_sessions',
+            sa.Column('version', sa.Integer(), nullable=False, server_default=sa.text('0'))
+        )
+    if 'last_answer_key' not in session_columns:
+        op.add_column('test_sessions', sa.Column('last_answer_key', sa.String(length=255), nullable=True))
+
+    if 'session_id' not in {column['name'] for column in inspector.get_columns('test_results')}:
+        op.add_column('test_results', sa.Column('session_id', sa.Integer(), nullable=True))
+        # Link the results sessions already point to; results a session left behind while
+        # losing a race stay unlinked.
+        op.execute(
+            """
+            UPDATE test_results
+            SET session_id = linked.session_id
+            FROM (
+                SELECT DISTINCT ON (test_result_id) test_result_id, id AS session_id
+                FROM test_sessions
+                WHERE test_result_id IS NOT NULL
+                ORDER BY test_result_id, id
+            ) AS linked
+            WHERE test_results.id = linked.test_result_id
+            """
+        )
+
+    if 'uq_test_results_session_id' not in {index['name'] for index in inspector.get_indexes('test_results')}:
+        op.create_index('uq_test_results_session_id', 'test_results', ['session_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_test_results_session_id', table_name='test_results')
+    op.drop_column('test_results', 'session_id')
+    op.drop_column('test_sessions', 'last_answer_key')
+    op.drop_column('test_sessions', 'version')
@@ -0,0 +1,28 @@
+"""Record which trait mapping test_sessions.trait_scores were summed under
+
+Revision ID: 009_session_trait_digest
+Revises: 008_session_versioning
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009_session_trait_digest'
+down_revision = '008_session_versioning'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing sessions keep NULL and get their totals recomputed the next time they are loaded.
+    # Databases bootstrapped with create_all may already have the column.
+    if 'trait_scores_digest' in {column['name'] for column in sa.inspect(op.get_bind()).get_columns('test_sessions')}:
+        return
+
+    op.add_column('test_sessions', sa.Column('trait_scores_digest', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('test_sessions', 'trait_scores_digest')
@@ -0,0 +1,550 @@
+"""
+Load benchmarks for the MTBI API.
+
+Every benchmark talks to a running backend over HTTP, so the same command can
+be pointed at two deployments (for example the previous release and the
+current branch) to compare them:
+
+    python bench.py answer-throughput --base-url http://localhost:8000 --concurrency 64
+    python bench.py chat-latency --base-url http://localhost:8000 --concurrency 16
+    CHAT_STREAM_TOKEN_DELAY_MS=50 uvicorn main:app  # then:
+    python bench.py chat-stream --base-url http://localhost:8000 --concurrency 200
+
+``query-counts`` instead runs the app in-process against DATABASE_URL and
+counts the SQL statements each endpoint issues, failing when one exceeds its
+budget in QUERY_BUDGETS. The database must already be migrated:
+
+    DATABASE_URL=postgresql://... python manage.py migrate
+    DATABASE_URL=postgresql://... python bench.py query-counts
+
+With SHARED_CACHE_URL set (python cache_server.py is enough) it also checks the
+reads a worker with cold in-process caches serves from the shared tier.
+tests/test_query_budgets.py runs the same check under pytest.
+
+``session-render``, ``intent-matcher`` and ``batch-scoring`` are pure CPU
+benchmarks of one code path on a single core; they need neither a server nor a
+database.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Dict, List
+
+import httpx
+
+# Maximum SQL statements per request in steady state (question bank already loaded).
+QUERY_BUDGETS: Dict[str, int] = {
+    "GET /questions": 0,
+    "POST /test-session (new)": 3,
+    "POST /test-session (resume)": 2,
+    "GET /test-session/{id}": 1,
+    "POST /test-session/{id}/answer": 1,
+    "POST /test-session/{id}/answer (last)": 3,
+    "POST /test-session/{id}/rewind": 2,
+    "POST /chat (cold cache)": 2,
+    "POST /chat": 1,
+    "GET /users/{id}/personality (cold cache)": 1,
+    "GET /users/{id}/personality": 0,
+    # Only measured with SHARED_CACHE_URL set: a worker whose in-process caches are cold.
+    # The bank's rows come from the shared tier; reading the app_metadata hash that keys them is one.
+    "GET /test-session/{id} (shared tier)": 1,
+    "GET /users/{id}/personality (shared tier)": 0,
+}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def print_report(name: str, latencies: List[float], elapsed: float, errors: int = 0) -> None:
+    total = len(latencies)
+    print(f"== {name}")
+    print(f"requests:   {total} ({errors} errors)")
+    print(f"elapsed:    {elapsed:.2f}s")
+    print(f"throughput: {total / elapsed if elapsed else 0:.1f} req/s")
+    if latencies:
+        print(f"latency:    mean {statistics.mean(latencies) * 1000:.1f}ms"
+              f" | p50 {percentile(latencies, 50) * 1000:.1f}ms"
+              f" | p95 {percentile(latencies, 95) * 1000:.1f}ms"
+              f" | p99 {percentile(latencies, 99) * 1000:.1f}ms")
+
+
+async def create_user(client: httpx.AsyncClient) -> int:
+    token = uuid.uuid4().hex[:12]
+    response = await client.post("/users", json={"name": f"bench-{token}", "email": f"bench-{token}@example.com"})
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+async def start_session(client: httpx.AsyncClient, user_id: int) -> Dict:
+    response = await client.post("/test-session", json={"user_id": user_id, "restart": True})
+    response.raise_for_status()
+    return response.json()
+
+
+async def answer_worker(client: httpx.AsyncClient, user_id: int, rounds: int, latencies: List[float]) -> int:
+    """Answer full tests sequentially for one user; concurrency comes from running many workers."""
+    errors = 0
+    for _ in range(rounds):
+        session = await start_session(client, user_id)
+        while session.get("question"):
+            payload = {"question_id": session["question"]["id"], "answer": random.randint(1, 5)}
+            started = time.perf_counter()
+            response = await client.post(f"/test-session/{session['id']}/answer", json=payload)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+                break
+            session = response.json()
+    return errors
+
+
+async def answer_throughput(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        user_ids = await asyncio.gather(*(create_user(client) for _ in range(args.concurrency)))
+        latencies: List[float] = []
+        started = time.perf_counter()
+        errors = await asyncio.gather(
+            *(answer_worker(client, user_id, args.rounds, latencies) for user_id in user_ids)
+        )
+        elapsed = time.perf_counter() - started
+    print_report("POST /test-session/{id}/answer", latencies, elapsed, sum(errors))
+
+
+async def chat_worker(client: httpx.AsyncClient, user_id: int, messages: int, latencies: List[float]) -> int:
+    errors = 0
+    for index in range(messages):
+        text = random.choice(["hello", "qual é o meu type?", f"mensagem {index}"])
+        started = time.perf_counter()
+        response = await client.post("/chat", json={"user_id": user_id, "message": text})
+        latencies.append(time.perf_counter() - started)
+        errors += response.status_code != 200
+    return errors
+
+
+async def chat_latency(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        user_ids = await asyncio.gather(*(create_user(client) for _ in range(args.concurrency)))
+        latencies: List[float] = []
+        started = time.perf_counter()
+        errors = await asyncio.gather(
+            *(chat_worker(client, user_id, args.messages, latencies) for user_id in user_ids)
+        )
+        elapsed = time.perf_counter() - started
+    print_report("POST /chat", latencies, elapsed, sum(errors))
+
+
+async def stream_worker(client: httpx.AsyncClient, user_id: int, messages: int,
+                        first_token: List[float], complete: List[float]) -> int:
+    errors = 0
+    for _ in range(messages):
+        started = time.perf_counter()
+        got_token = False
+        async with client.stream("POST", "/chat/stream",
+                                 json={"user_id": user_id, "message": "qual é o meu type?"}) as response:
+            if response.status_code != 200:
+                errors += 1
+                continue
+            async for line in response.aiter_lines():
+                if line == "event: token" and not got_token:
+                    first_token.append(time.perf_counter() - started)
+                    got_token = True
+                elif line == "event: error":
+                    errors += 1
+        complete.append(time.perf_counter() - started)
+    return errors
+
+
+async def chat_stream(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        user_ids = await asyncio.gather(*(create_user(client) for _ in range(args.concurrency)))
+        first_token: List[float] = []
+        complete: List[float] = []
+        started = time.perf_counter()
+        errors = await asyncio.gather(
+            *(stream_worker(client, user_id, args.messages, first_token, complete) for user_id in user_ids)
+        )
+        elapsed = time.perf_counter() - started
+    print_report("POST /chat/stream (first token)", first_token, elapsed, sum(errors))
+    print_report("POST /chat/stream (complete)", complete, elapsed, sum(errors))
+
+
+class QueryCounter:
+    """Count statements sent through an engine, via the before_cursor_execute hook."""
+
+    def __init__(self, engine) -> None:
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args) -> None:
+        self.count += 1
+
+
+async def measure_query_counts() -> Dict[str, int]:
+    """
+    Drive every endpoint once in-process against DATABASE_URL and return the statements each issued.
+
+    Shared by ``query-counts`` and tests/test_query_budgets.py; the database must be migrated.
+    """
+    import main as app_module
+
+    # The background question bank poll would add statements to whichever request it overlaps.
+    app_module.question_bank_watcher.interval = 0
+    counter = QueryCounter(app_module.async_engine.sync_engine)
+    counts: Dict[str, int] = {}
+
+    async def measure(label: str, client: httpx.AsyncClient, method: str, url: str, **kwargs) -> Dict:
+        counter.count = 0
+        response = await client.request(method, url, **kwargs)
+        response.raise_for_status()
+        counts[label] = counter.count
+        return response.json()
+
+    async with app_module.app.router.lifespan_context(app_module.app):
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            user_id = await create_user(client)
+            # Warm the question bank so every count reflects steady state.
+            await start_session(client, user_id)
+            await measure("GET /questions", client, "GET", "/questions")
+            session = await measure("POST /test-session (new)", client, "POST", "/test-session",
+                                    json={"user_id": user_id, "restart": True})
+            await measure("POST /test-session (resume)", client, "POST", "/test-session",
+                          json={"user_id": user_id})
+            session_url = f"/test-session/{session['id']}"
+            await measure("GET /test-session/{id}", client, "GET", session_url)
+            await measure("POST /test-session/{id}/answer", client, "POST", f"{session_url}/answer",
+                          json={"question_id": session["question"]["id"], "answer": 4})
+            session = await measure("POST /test-session/{id}/rewind", client, "POST", f"{session_url}/rewind")
+            while session["current_index"] < session["total_questions"] - 1:
+                response = await client.post(f"{session_url}/answer",
+                                             json={"question_id": session["question"]["id"], "answer": 2})
+                session = response.json()
+            await measure("POST /test-session/{id}/answer (last)", client, "POST", f"{session_url}/answer",
+                          json={"question_id": session["question"]["id"], "answer": 5})
+            app_module.personality_cache.clear()
+            await measure("POST /chat (cold cache)", client, "POST", "/chat",
+                          json={"user_id": user_id, "message": "hello"})
+            await measure("POST /chat", client, "POST", "/chat",
+                          json={"user_id": user_id, "message": "qual é o meu type?"})
+            app_module.personality_cache.clear()
+            await measure("GET /users/{id}/personality (cold cache)", client, "GET", f"/users/{user_id}/personality")
+            await measure("GET /users/{id}/personality", client, "GET", f"/users/{user_id}/personality")
+            if app_module.shared_cache is not None and app_module.shared_cache.stats()["available"]:
+                app_module.invalidate_question_bank()
+                app_module.personality_cache.clear()
+                await measure("GET /test-session/{id} (shared tier)", client, "GET", session_url)
+                await measure("GET /users/{id}/personality (shared tier)", client, "GET", f"/users/{user_id}/personality")
+            elif app_module.shared_cache is not None:
+                print("⚠ Shared cache configured but unreachable; skipping the shared tier budgets")
+    await app_module.async_engine.dispose()
+    return counts
+
+
+async def query_counts(args: argparse.Namespace) -> None:
+    counts = await measure_query_counts()
+    failures = 0
+    for label, count in counts.items():
+        budget = QUERY_BUDGETS.get(label)
+        status = "" if budget is None else ("ok" if count <= budget else "OVER BUDGET")
+        failures += status == "OVER BUDGET"
+        print(f"{label:<42} {count:>3} queries  budget {budget if budget is not None else '-':>3}  {status}")
+    if failures:
+        raise SystemExit(1)
+
+
+def legacy_generate_ai_response(user_message: str, personality_type: str = None) -> str:
+    """generate_ai_response as it was before the precompiled matcher, kept as the baseline."""
+    from main import PERSONALITY_DESCRIPTIONS
+
+    personality_description = PERSONALITY_DESCRIPTIONS.get(
+        personality_type or "",
+        "Cada pessoa manifesta qualidades únicas; vamos explorar as suas juntas.",
+    )
+
+    responses = {
+        "greeting": "Olá! Estou aqui para ajudar você a explorar sua personalidade. Como tem se sentido hoje?",
+        "personality": (
+            f"Seus resultados indicam o tipo {personality_type}. {personality_description}"
+            if personality_type
+            else "Conte-me um pouco mais sobre o seu resultado para que eu possa ajudar."
+        ),
+        "default": "Interessante! Conte mais para entendermos como isso se conecta com o seu estilo pessoal.",
+    }
+
+    message_lower = user_message.lower()
+
+    if any(word in message_lower for word in ["hello", "hi", "hey"]):
+        return responses["greeting"]
+    elif personality_type and any(word in message_lower for word in ["personality", "type", "result"]):
+        return responses["personality"]
+    else:
+        return responses["default"]
+
+
+CHAT_SAMPLES = [
+    "hello", "Hey there!", "oi, tudo bem?", "Bom dia", "what is my personality type?",
+    "qual é o meu tipo?", "me fala do meu resultado", "Can you explain my results?",
+    "Estou me sentindo cansado depois do trabalho e queria conversar um pouco sobre isso.",
+    "I think the weather is nice today and I went for a long walk in the park.",
+]
+
+
+def intent_matcher(args: argparse.Namespace) -> None:
+    import main as app_module
+
+    rng = random.Random(args.seed)
+    codes = list(app_module.PERSONALITY_DESCRIPTIONS) + [None]
+    messages = [(rng.choice(CHAT_SAMPLES), rng.choice(codes)) for _ in range(args.messages)]
+
+    print("== generate_ai_response")
+    for label, generate in (("legacy", legacy_generate_ai_response), ("compiled", app_module.generate_ai_response)):
+        started = time.perf_counter()
+        for text, personality_type in messages:
+            generate(text, personality_type)
+        elapsed = time.perf_counter() - started
+        print(f"{label + ':':<10}  {len(messages) / elapsed:,.0f} messages/s")
+
+    # Expected differences: the legacy matcher used substring tests ("hi" inside "this")
+    # and knew no Portuguese keywords.
+    changed = sum(
+        legacy_generate_ai_response(text, personality_type) != app_module.generate_ai_response(text, personality_type)
+        for text, personality_type in set(messages)
+    )
+    print(f"replies that differ from legacy: {changed} of {len(set(messages))} distinct inputs")
+
+
+def legacy_session_response(session_obj, bank, question_payloads):
+    """build_session_response as it was before the pre-rendered fragments, kept as the baseline."""
+    from main import (
+        AnsweredQuestion,
+        TestSessionResponse,
+        load_json_array,
+        next_question_id,
+        personality_from_scores,
+    )
+
+    question_order = load_json_array(session_obj.question_order)
+    answers_raw = load_json_array(session_obj.answers)
+    question_id = next_question_id(session_obj, question_order)
+    next_question = question_payloads.get(question_id)
+
+    answered_items = []
+    for answer_data in answers_raw:
+        question = bank.questions_by_id.get(answer_data.get("question_id"))
+        if question:
+            answered_items.append(
+                AnsweredQuestion(question_id=question.id, answer=int(answer_data.get("answer", 0)), dimension=question.dimension)
+            )
+
+    trait_scores = None
+    personality_type = None
+    if answers_raw:
+        trait_scores = dict(session_obj.trait_scores)
+        if session_obj.status == "completed":
+            personality_type = personality_from_scores(trait_scores)
+
+    return TestSessionResponse(
+        id=session_obj.id,
+        user_id=session_obj.user_id,
+        status=session_obj.status,
+        current_index=session_obj.current_index,
+        total_questions=len(question_order),
+        answers_count=len(answers_raw),
+        question=next_question,
+        answered=answered_items,
+        personality_type=personality_type,
+        trait_scores=trait_scores,
+        completed_at=session_obj.completed_at,
+        test_result_id=session_obj.test_result_id,
+    )
+
+
+async def session_render(args: argparse.Namespace) -> None:
+    from datetime import datetime
+
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    import main as app_module
+
+    rng = random.Random(args.seed)
+    bank = app_module.QuestionBank.build(0, [SimpleNamespace(**row) for row in app_module.DEFAULT_QUESTIONS])
+    question_ids = bank.question_ids
+    question_payloads = {question.id: app_module.QuestionResponse.model_validate(question) for question in bank.questions}
+    sessions = []
+    for session_id in range(1, args.sessions + 1):
+        answered = rng.randint(0, len(question_ids))
+        answers = [{"question_id": question_id, "answer": rng.randint(1, 5)} for question_id in question_ids[:answered]]
+        completed = answered == len(question_ids)
+        sessions.append(SimpleNamespace(
+            id=session_id,
+            user_id=rng.randint(1, 10_000),
+            status="completed" if completed else "in_progress",
+            current_index=answered,
+            question_order=list(question_ids),
+            answers=answers,
+            trait_scores=app_module.recompute_trait_scores(answers, bank),
+            completed_at=datetime(2024, 5, 1, 12, 30, rng.randint(0, 59), rng.choice([0, rng.randint(1, 999_999)])) if completed else None,
+            test_result_id=session_id if completed else None,
+            version=answered,
+        ))
+
+    # What FastAPI did per request: validate the returned model against response_model, then encode it.
+    field = create_response_field(name="Response_test_session", type_=app_module.TestSessionResponse)
+
+    async def legacy(session_obj) -> bytes:
+        content = await serialize_response(field=field, response_content=legacy_session_response(session_obj, bank, question_payloads))
+        return JSONResponse(content).body
+
+    async def fast(session_obj) -> bytes:
+        return app_module.render_session_response(session_obj, bank).body
+
+    mismatches = 0
+    for session_obj in sessions:
+        mismatches += await legacy(session_obj) != await fast(session_obj)
+
+    print(f"== TestSessionResponse rendering, one core, {len(sessions)} sessions")
+    for label, render in (("pydantic", legacy), ("fragments", fast)):
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            for session_obj in sessions:
+                await render(session_obj)
+        elapsed = time.perf_counter() - started
+        print(f"{label + ':':<11} {args.rounds * len(sessions) / elapsed:,.0f} responses/s")
+    print(f"byte mismatches: {mismatches} of {len(sessions)}")
+
+    # Bytes a client downloads answering a whole test, one response per answer.
+    payloads = {"full": 0, "compact": 0}
+    for answered in range(1, len(question_ids) + 1):
+        answers = [{"question_id": question_id, "answer": 3} for question_id in question_ids[:answered]]
+        session_obj = SimpleNamespace(
+            id=1, user_id=1, status="completed" if answered == len(question_ids) else "in_progress",
+            current_index=answered, question_order=list(question_ids), answers=answers,
+            trait_scores=app_module.recompute_trait_scores(answers, bank), completed_at=None, test_result_id=None,
+            version=answered,
+        )
+        for view in payloads:
+            payloads[view] += len(app_module.SESSION_RENDERERS[view](session_obj, bank).body)
+    print(f"bytes per full test ({len(question_ids)} answers): full {payloads['full']:,}, compact {payloads['compact']:,}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+def batch_scoring(args: argparse.Namespace) -> None:
+    import numpy as np
+
+    import main as app_module
+
+    bank = app_module.QuestionBank.build(0, [SimpleNamespace(**row) for row in app_module.DEFAULT_QUESTIONS])
+    weights = bank.trait_weights
+    answers = np.random.default_rng(args.seed).integers(1, 6, size=(args.rows, len(weights.question_ids)), dtype=np.int8)
+
+    started = time.perf_counter()
+    app_module.score_answer_matrix(answers, weights)
+    vectorised = time.perf_counter() - started
+
+    sample = answers[: args.scalar_rows]
+    started = time.perf_counter()
+    for row in sample:
+        app_module.calculate_mtbi_type(
+            [app_module.QuestionAnswer(question_id=question_id, answer=int(answer))
+             for question_id, answer in zip(weights.question_ids, row)],
+            bank.questions_by_id,
+        )
+    scalar = time.perf_counter() - started
+
+    print("== calculate_mtbi_type vs score_answer_matrix")
+    print(f"scalar:     {len(sample) / scalar:,.0f} submissions/s ({len(sample)} rows)")
+    print(f"vectorised: {args.rows / vectorised:,.0f} submissions/s ({args.rows} rows)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    answer_parser = subparsers.add_parser(
+        "answer-throughput",
+        help="Concurrent answer submissions against /test-session/{id}/answer.",
+    )
+    answer_parser.add_argument("--base-url", default="http://localhost:8000")
+    answer_parser.add_argument("--concurrency", type=int, default=32)
+    answer_parser.add_argument("--rounds", type=int, default=5, help="Full tests answered per simulated user.")
+    answer_parser.add_argument("--timeout", type=float, default=30.0)
+    answer_parser.set_defaults(handler=answer_throughput)
+
+    chat_parser = subparsers.add_parser(
+        "chat-latency",
+        help="Concurrent chat messages against /chat.",
+    )
+    chat_parser.add_argument("--base-url", default="http://localhost:8000")
+    chat_parser.add_argument("--concurrency", type=int, default=16)
+    chat_parser.add_argument("--messages", type=int, default=50, help="Messages sent per simulated user.")
+    chat_parser.add_argument("--timeout", type=float, default=30.0)
+    chat_parser.set_defaults(handler=chat_latency)
+
+    stream_parser = subparsers.add_parser(
+        "chat-stream",
+        help="Concurrent SSE streams against /chat/stream: time to first token and to completion.",
+    )
+    stream_parser.add_argument("--base-url", default="http://localhost:8000")
+    stream_parser.add_argument("--concurrency", type=int, default=64, help="Simultaneous open streams.")
+    stream_parser.add_argument("--messages", type=int, default=5, help="Streams opened per simulated user.")
+    stream_parser.add_argument("--timeout", type=float, default=60.0)
+    stream_parser.set_defaults(handler=chat_stream)
+
+    counts_parser = subparsers.add_parser(
+        "query-counts",
+        help="Count SQL statements per endpoint in-process and check them against QUERY_BUDGETS.",
+    )
+    counts_parser.set_defaults(handler=query_counts)
+
+    scoring_parser = subparsers.add_parser(
+        "batch-scoring",
+        help="Compare the scalar scorer with the NumPy batch scorer in-process.",
+    )
+    scoring_parser.add_argument("--rows", type=int, default=1_000_000)
+    scoring_parser.add_argument("--scalar-rows", type=int, default=20_000)
+    scoring_parser.add_argument("--seed", type=int, default=0)
+    scoring_parser.set_defaults(handler=batch_scoring)
+
+    render_parser = subparsers.add_parser(
+        "session-render",
+        help="Responses per second per core for the Pydantic and the pre-rendered session response, and payload sizes.",
+    )
+    render_parser.add_argument("--sessions", type=int, default=2_000)
+    render_parser.add_argument("--rounds", type=int, default=5)
+    render_parser.add_argument("--seed", type=int, default=0)
+    render_parser.set_defaults(handler=session_render)
+
+    intent_parser = subparsers.add_parser(
+        "intent-matcher",
+        help="Messages per second through the legacy and the precompiled chat intent matcher.",
+    )
+    intent_parser.add_argument("--messages", type=int, default=200_000)
+    intent_parser.add_argument("--seed", type=int, default=0)
+    intent_parser.set_defaults(handler=intent_matcher)
+
+    args = parser.parse_args()
+    if asyncio.iscoroutinefunction(args.handler):
+        asyncio.run(args.handler(args))
+    else:
+        args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+In-memory stand-in for the Redis server behind SHARED_CACHE_URL, for developing
+and testing the shared cache tier without running Redis.
+
+It speaks just enough RESP2 for SharedCache and redis-py's connection handshake:
+PING, GET, SET (EX/PX/NX/XX), DEL, INCR(BY), PUBLISH, SUBSCRIBE, UNSUBSCRIBE,
+WATCH/MULTI/EXEC (with UNWATCH and DISCARD) and FLUSHALL; CLIENT and SELECT are
+acknowledged and ignored. Nothing is persisted.
+
+    python cache_server.py --port 6380
+    SHARED_CACHE_URL=redis://localhost:6380/0 uvicorn main:app --workers 4
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+Reply = bytes
+
+
+def simple(text: str) -> Reply:
+    return f"+{text}\r\n".encode()
+
+
+def error(text: str) -> Reply:
+    return f"-ERR {text}\r\n".encode()
+
+
+def integer(value: int) -> Reply:
+    return f":{value}\r\n".encode()
+
+
+def bulk(value: Optional[bytes]) -> Reply:
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def array(items: List[Reply]) -> Reply:
+    return b"*%d\r\n" % len(items) + b"".join(items)
+
+
+class Client:
+    """Per-connection state: channel subscriptions, WATCHed key revisions and the MULTI queue."""
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.subscriptions: Set[bytes] = set()
+        self.watched: Dict[bytes, Tuple[int, int]] = {}
+        self.queue: Optional[List[List[bytes]]] = None
+
+
+class CacheServer:
+    def __init__(self) -> None:
+        self.values: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.channels: Dict[bytes, Set[asyncio.StreamWriter]] = {}
+        # Bumped on every write to a key (and for all keys by FLUSHALL), so EXEC can tell
+        # whether a WATCHed key changed.
+        self.revisions: Dict[bytes, int] = {}
+        self.flushes = 0
+
+    def revision(self, key: bytes) -> Tuple[int, int]:
+        self.lookup(key)
+        return self.flushes, self.revisions.get(key, 0)
+
+    def touch(self, key: bytes) -> None:
+        self.revisions[key] = self.revisions.get(key, 0) + 1
+
+    def lookup(self, key: bytes) -> Optional[bytes]:
+        entry = self.values.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self.values[key]
+            self.touch(key)
+            return None
+        return value
+
+    def execute(self, args: List[bytes], client: Client) -> Reply:
+        command = args[0].upper()
+        if client.queue is not None and command not in (b"EXEC", b"DISCARD", b"MULTI", b"WATCH"):
+            client.queue.append(args)
+            return simple("QUEUED")
+        if command == b"WATCH":
+            if client.queue is not None:
+                return error("WATCH inside MULTI is not allowed")
+            for key in args[1:]:
+                client.watched.setdefault(key, self.revision(key))
+            return simple("OK")
+        if command == b"UNWATCH":
+            client.watched.clear()
+            return simple("OK")
+        if command == b"MULTI":
+            if client.queue is not None:
+                return error("MULTI calls can not be nested")
+            client.queue = []
+            return simple("OK")
+        if command == b"DISCARD":
+            if client.queue is None:
+                return error("DISCARD without MULTI")
+            client.queue = None
+            client.watched.clear()
+            return simple("OK")
+        if command == b"EXEC":
+            if client.queue is None:
+                return error("EXEC without MULTI")
+            queued, client.queue = client.queue, None
+            changed = any(self.revision(key) != revision for key, revision in client.watched.items())
+            client.watched.clear()
+            if changed:
+                return b"*-1\r\n"
+            return array([self.execute(queued_args, client) for queued_args in queued])
+        return self.run(command, args, client.writer, client.subscriptions)
+
+    def run(self, command: bytes, args: List[bytes], writer: asyncio.StreamWriter, subscriptions: Set[bytes]) -> Reply:
+        if command == b"PING":
+            if subscriptions:
+                return array([bulk(b"pong"), bulk(args[1] if len(args) > 1 else b"")])
+            return bulk(args[1]) if len(args) > 1 else simple("PONG")
+        if command in (b"CLIENT", b"SELECT"):
+            return simple("OK")
+        if command == b"GET":
+            return bulk(self.lookup(args[1]))
+        if command == b"SET":
+            return self.set(args[1:])
+        if command == b"DEL":
+            deleted = 0
+            for key in args[1:]:
+                if self.values.pop(key, None) is not None:
+                    self.touch(key)
+                    deleted += 1
+            return integer(deleted)
+        if command in (b"INCR", b"INCRBY"):
+            current = self.lookup(args[1])
+            try:
+                value = int(current or b"0") + (int(args[2]) if command == b"INCRBY" else 1)
+            except ValueError:
+                return error("value is not an integer or out of range")
+            expires_at = self.values[args[1]][1] if current is not None else None
+            self.values[args[1]] = (str(value).encode(), expires_at)
+            self.touch(args[1])
+            return integer(value)
+        if command == b"PUBLISH":
+            message = array([bulk(b"message"), bulk(args[1]), bulk(args[2])])
+            receivers = self.channels.get(args[1], set())
+            for receiver in receivers:
+                receiver.write(message)
+            return integer(len(receivers))
+        if command == b"SUBSCRIBE":
+            replies = []
+            for channel in args[1:]:
+                subscriptions.add(channel)
+                self.channels.setdefault(channel, set()).add(writer)
+                replies.append(array([bulk(b"subscribe"), bulk(channel), integer(len(subscriptions))]))
+            return b"".join(replies)
+        if command == b"UNSUBSCRIBE":
+            replies = []
+            for channel in args[1:] or list(subscriptions):
+                subscriptions.discard(channel)
+                self.channels.get(channel, set()).discard(writer)
+                replies.append(array([bulk(b"unsubscribe"), bulk(channel), integer(len(subscriptions))]))
+            return b"".join(replies)
+        if command == b"FLUSHALL":
+            self.values.clear()
+            self.flushes += 1
+            return simple("OK")
+        return error(f"unknown command '{args[0].decode(errors='replace')}'")
+
+    def set(self, args: List[bytes]) -> Reply:
+        key, value, options = args[0], args[1], [option.upper() for option in args[2:]]
+        expires_at = None
+        if b"EX" in options:
+            expires_at = time.monotonic() + int(args[2 + options.index(b"EX") + 1])
+        elif b"PX" in options:
+            expires_at = time.monotonic() + int(args[2 + options.index(b"PX") + 1]) / 1000
+        exists = self.lookup(key) is not None
+        if (b"NX" in options and exists) or (b"XX" in options and not exists):
+            return bulk(None)
+        self.values[key] = (value, expires_at)
+        self.touch(key)
+        return simple("OK")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client = Client(writer)
+        try:
+            while True:
+                args = await read_command(reader)
+                if args is None:
+                    break
+                writer.write(self.execute(args, client))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for channel in client.subscriptions:
+                self.channels.get(channel, set()).discard(writer)
+            writer.close()
+
+
+async def read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    """Read one command sent as an array of bulk strings; None once the client hangs up."""
+    header = await reader.readline()
+    if not header:
+        return None
+    if not header.startswith(b"*"):
+        return header.split()
+    args = []
+    for _ in range(int(header[1:])):
+        length = int((await reader.readline())[1:])
+        args.append((await reader.readexactly(length + 2))[:-2])
+    return args
+
+
+async def serve(host: str, port: int) -> None:
+    cache = CacheServer()
+    server = await asyncio.start_server(cache.handle, host, port)
+    print(f"✓ Cache stand-in listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
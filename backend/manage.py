@@ -0,0 +1,350 @@
+"""
+Administrative commands for the MTBI backend.
+
+    python manage.py migrate         # wait for Postgres, apply migrations, seed questions
+    python manage.py seed            # upsert DEFAULT_QUESTIONS if their hash changed
+    python manage.py seed --force    # upsert even when the stored hash matches
+    python manage.py rescore         # recompute test_results.personality_type (resumable)
+    python manage.py import-tests submissions.ndjson   # bulk-load test submissions (JSON array or NDJSON)
+    python manage.py import-users users.csv            # bulk-register users (CSV with name,email or NDJSON)
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, AsyncIterator, BinaryIO, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, select, text
+
+import main
+
+RESCORE_CHECKPOINT_KEY = "rescore_checkpoint"
+
+_worker_weights: Optional[main.TraitWeights] = None
+
+
+async def seed(args: argparse.Namespace) -> None:
+    async with main.AsyncSessionLocal() as session:
+        changed = await main.seed_questions(session, force=args.force)
+    if changed:
+        print(f"✓ Question bank seeded (hash {main.DEFAULT_QUESTIONS_DIGEST[:12]})")
+    else:
+        print("✓ Question bank already up to date")
+
+
+async def migrate(args: argparse.Namespace) -> None:
+    """One-shot schema setup, run once per deployment before the API workers start."""
+    main.wait_for_database()
+    main.run_alembic_migrations()
+    await seed(args)
+    print("Database initialization completed successfully")
+
+
+def _init_rescore_worker(scoring_table: Mapping[int, Tuple[str, str]]) -> None:
+    global _worker_weights
+    _worker_weights = main.TraitWeights.from_scoring_table(scoring_table)
+
+
+def _is_scorable(answers: Any, weights: main.TraitWeights) -> bool:
+    """Mirror the rows calculate_mtbi_type would accept: known, unique questions answered 1-5."""
+    if not isinstance(answers, list):
+        return False
+    seen = set()
+    for answer in answers:
+        if not isinstance(answer, dict):
+            return False
+        question_id = answer.get("question_id")
+        value = answer.get("answer")
+        if question_id not in weights.columns or question_id in seen:
+            return False
+        if not isinstance(value, int) or not 1 <= value <= 5:
+            return False
+        seen.add(question_id)
+    return True
+
+
+def _rescore_batch(rows: Sequence[Tuple[int, str, Any]]) -> Tuple[int, int, List[Dict[str, Any]], int]:
+    """Score one batch in a worker process; returns (last id, rows seen, changed rows, skipped rows)."""
+    weights = _worker_weights
+    scorable = [row for row in rows if _is_scorable(row[2], weights)]
+    changes: List[Dict[str, Any]] = []
+    if scorable:
+        matrix = weights.answer_matrix([answers for _, _, answers in scorable])
+        _, personality_types = main.score_answer_matrix(matrix, weights)
+        changes = [
+            {"id": result_id, "personality_type": str(personality_type)}
+            for (result_id, current_type, _), personality_type in zip(scorable, personality_types)
+            if personality_type != current_type
+        ]
+    return rows[-1][0], len(rows), changes, len(rows) - len(scorable)
+
+
+def _load_scoring_table() -> Dict[int, Tuple[str, str]]:
+    with main.SessionLocal() as session:
+        rows = session.execute(
+            select(main.Question.id, main.Question.trait_high, main.Question.trait_low)
+        ).all()
+    return {row.id: (row.trait_high, row.trait_low) for row in rows}
+
+
+def _scoring_digest(scoring_table: Mapping[int, Tuple[str, str]]) -> str:
+    return main.question_bank_digest(
+        [{"id": question_id, "traits": list(traits)} for question_id, traits in scoring_table.items()]
+    )
+
+
+def _read_checkpoint(digest: str) -> int:
+    """Return the last rescored id, or 0 when there is no checkpoint for this scoring table."""
+    with main.SessionLocal() as session:
+        raw = session.scalar(
+            select(main.AppMetadata.value).where(main.AppMetadata.key == RESCORE_CHECKPOINT_KEY)
+        )
+    if not raw:
+        return 0
+    checkpoint = json.loads(raw)
+    if checkpoint.get("digest") != digest:
+        print("⚠ Questions changed since the last checkpoint, starting over")
+        return 0
+    return int(checkpoint.get("last_id", 0))
+
+
+def _write_batch(changes: List[Dict[str, Any]], last_id: int, digest: str) -> List[int]:
+    """Apply one batch of updates and advance the checkpoint in the same transaction; returns the affected users."""
+    user_ids: List[int] = []
+    with main.SessionLocal() as session:
+        if changes:
+            user_ids = session.scalars(
+                text(
+                    "UPDATE test_results SET personality_type = v.personality_type "
+                    "FROM unnest(CAST(:ids AS integer[]), CAST(:types AS text[])) AS v(id, personality_type) "
+                    "WHERE test_results.id = v.id "
+                    "RETURNING test_results.user_id"
+                ),
+                {
+                    "ids": [change["id"] for change in changes],
+                    "types": [change["personality_type"] for change in changes],
+                },
+            ).all()
+            # Keep the users.latest_personality_type projection in step with rescored results.
+            session.execute(
+                text(
+                    "UPDATE users SET latest_personality_type = test_results.personality_type "
+                    "FROM test_results "
+                    "WHERE test_results.id = ANY(CAST(:ids AS integer[])) "
+                    "AND users.id = test_results.user_id "
+                    "AND users.latest_result_at = test_results.completed_at"
+                ),
+                {"ids": [change["id"] for change in changes]},
+            )
+            user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+        checkpoint = main.pg_insert(main.AppMetadata).values(
+            key=RESCORE_CHECKPOINT_KEY,
+            value=json.dumps({"last_id": last_id, "digest": digest}),
+            updated_at=datetime.utcnow(),
+        )
+        session.execute(
+            checkpoint.on_conflict_do_update(
+                index_elements=[main.AppMetadata.key],
+                set_={"value": checkpoint.excluded.value, "updated_at": checkpoint.excluded.updated_at},
+            )
+        )
+        session.commit()
+    return user_ids
+
+
+def _clear_checkpoint() -> None:
+    with main.SessionLocal() as session:
+        session.execute(delete(main.AppMetadata).where(main.AppMetadata.key == RESCORE_CHECKPOINT_KEY))
+        session.commit()
+
+
+async def rescore(args: argparse.Namespace) -> None:
+    """
+    Recompute personality_type for every test result with the current questions.
+
+    Rows are streamed by id through a server-side cursor, scored in a process
+    pool and written back in bulk UPDATE batches. The last committed id is
+    checkpointed in app_metadata, so an interrupted run resumes where it stopped.
+    After each batch commits, the affected users' cached personalities are dropped
+    so the API workers read the rescored types.
+    """
+    scoring_table = _load_scoring_table()
+    if not scoring_table:
+        raise SystemExit("✗ The questions table is empty; run 'python manage.py seed' first.")
+    digest = _scoring_digest(scoring_table)
+
+    start_id = 0 if args.restart else _read_checkpoint(digest)
+    with main.engine.connect() as conn:
+        max_id = conn.scalar(select(func.max(main.TestResult.id))) or 0
+    if start_id >= max_id:
+        print("✓ Nothing to rescore")
+        _clear_checkpoint()
+        return
+    print(f"Rescoring test results with id > {start_id} (max id {max_id}) using {args.workers} workers...")
+
+    seen = updated = skipped = 0
+    started = time.perf_counter()
+    pending = deque()
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_rescore_worker,
+        initargs=(scoring_table,),
+    ) as pool, main.engine.connect() as reader:
+        result = reader.execution_options(stream_results=True, max_row_buffer=args.batch_size).execute(
+            select(main.TestResult.id, main.TestResult.personality_type, main.TestResult.answers)
+            .where(main.TestResult.id > start_id)
+            .order_by(main.TestResult.id)
+        )
+
+        async def drain(limit: int) -> None:
+            # Results are written in submission order so the checkpoint only ever moves forward.
+            nonlocal seen, updated, skipped
+            while len(pending) > limit:
+                last_id, batch_seen, changes, batch_skipped = pending.popleft().result()
+                await main.forget_latest_personalities(_write_batch(changes, last_id, digest))
+                seen += batch_seen
+                updated += len(changes)
+                skipped += batch_skipped
+                elapsed = time.perf_counter() - started
+                progress = 100 * (last_id - start_id) / (max_id - start_id)
+                print(
+                    f"  {progress:5.1f}% | id {last_id} | {seen} read, {updated} updated, "
+                    f"{skipped} skipped | {seen / elapsed:,.0f} rows/s"
+                )
+
+        for partition in result.partitions(args.batch_size):
+            pending.append(pool.submit(_rescore_batch, [tuple(row) for row in partition]))
+            await drain(args.workers * 2)
+        await drain(0)
+
+    _clear_checkpoint()
+    print(f"✓ Rescored {seen} test results: {updated} updated, {skipped} skipped as unscorable")
+
+
+async def _file_chunks(handle: BinaryIO, size: int = 1 << 16) -> AsyncIterator[bytes]:
+    while True:
+        chunk = handle.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def _iter_submission_file(handle: BinaryIO) -> AsyncIterator[Any]:
+    """A JSON array is loaded whole; anything else is streamed as NDJSON."""
+    head = handle.read(1 << 10)
+    handle.seek(0)
+    if head.lstrip().startswith(b"["):
+        for payload in json.load(handle):
+            yield payload
+        return
+    async for payload in main.iter_ndjson(_file_chunks(handle)):
+        yield payload
+
+
+async def import_tests(args: argparse.Namespace) -> None:
+    """Load test submissions from a partner file through the same path as /submit-tests/bulk."""
+    started = time.perf_counter()
+    created = failed = 0
+
+    async def flush(session, bank, batch) -> None:
+        nonlocal created, failed
+        outcomes = await main.import_test_submissions(session, bank, batch)
+        await session.commit()
+        await main.remember_imported_results(outcomes)
+        for outcome in outcomes:
+            if outcome["status"] == "created":
+                created += 1
+            else:
+                failed += 1
+                print(f"✗ item {outcome['index']}: {outcome['detail']}")
+        print(f"  {created + failed} processed | {created} created, {failed} failed")
+
+    async with main.AsyncSessionLocal() as session:
+        bank = await main.get_question_bank(session)
+        batch: List[Tuple[int, Any]] = []
+        with open(args.path, "rb") as handle:
+            index = 0
+            async for payload in _iter_submission_file(handle):
+                batch.append((index, payload))
+                index += 1
+                if len(batch) >= args.batch_size:
+                    await flush(session, bank, batch)
+                    batch = []
+        if batch:
+            await flush(session, bank, batch)
+
+    elapsed = time.perf_counter() - started
+    print(f"✓ Imported {created} test results, {failed} failed ({(created + failed) / elapsed:,.0f} items/s)")
+
+
+async def import_users(args: argparse.Namespace) -> None:
+    """Register users from a CSV or NDJSON file through the same path as /users/bulk."""
+    file_format = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    started = time.perf_counter()
+
+    def progress(summary: Dict[str, Any]) -> None:
+        print(f"  {summary['total']} read | {summary['created']} created, "
+              f"{summary['duplicates']} duplicates, {summary['invalid']} invalid")
+
+    with open(args.path, "rb") as handle:
+        chunks = _file_chunks(handle)
+        records = main.iter_csv_records(chunks) if file_format == "csv" else main.iter_ndjson(chunks)
+        async with main.AsyncSessionLocal() as session:
+            summary = await main.import_users(session, records, args.batch_size, on_batch=progress)
+
+    for error in summary["errors"]:
+        print(f"✗ row {error['index']}: {error['detail']}")
+    elapsed = time.perf_counter() - started
+    print(f"✓ Registered {summary['created']} users, {summary['duplicates']} duplicates, "
+          f"{summary['invalid']} invalid ({summary['total'] / elapsed:,.0f} rows/s)")
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Wait for the database, migrate it and seed questions.")
+    migrate_parser.set_defaults(handler=migrate, force=False)
+
+    seed_parser = subparsers.add_parser("seed", help="Seed the default question bank.")
+    seed_parser.add_argument("--force", action="store_true", help="Ignore the stored question bank hash.")
+    seed_parser.set_defaults(handler=seed)
+
+    rescore_parser = subparsers.add_parser("rescore", help="Recompute personality types of stored test results.")
+    rescore_parser.add_argument("--batch-size", type=int, default=5000)
+    rescore_parser.add_argument("--workers", type=int, default=4)
+    rescore_parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint.")
+    rescore_parser.set_defaults(handler=rescore)
+
+    import_parser = subparsers.add_parser("import-tests", help="Bulk-load test submissions from a JSON array or NDJSON file.")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--batch-size", type=int, default=main.BULK_SUBMIT_BATCH_SIZE)
+    import_parser.set_defaults(handler=import_tests)
+
+    users_parser = subparsers.add_parser("import-users", help="Bulk-register users from a CSV or NDJSON file.")
+    users_parser.add_argument("path")
+    users_parser.add_argument("--format", choices=("csv", "ndjson"), help="Default: from the file extension.")
+    users_parser.add_argument("--batch-size", type=int, default=main.BULK_USER_BATCH_SIZE)
+    users_parser.set_defaults(handler=import_users)
+
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+async def run(args: argparse.Namespace) -> None:
+    try:
+        if asyncio.iscoroutinefunction(args.handler):
+            await args.handler(args)
+        else:
+            args.handler(args)
+    finally:
+        if main.shared_cache is not None:
+            await main.shared_cache.aclose()
+        await main.async_engine.dispose()
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,42 @@
+"""
+Local stand-in for a hosted language model, for developing and load-testing the
+chat against CHAT_GENERATOR=http without any outside service.
+
+It speaks the protocol HTTPModelGenerator expects: POST /generate with
+{"message", "personality_type"} answered by NDJSON lines {"text": ...}. Replies
+are the rule-based ones, streamed word by word with a configurable delay:
+
+    MODEL_TOKEN_DELAY_MS=40 MODEL_FIRST_TOKEN_DELAY_MS=300 uvicorn model_server:app --port 8001
+"""
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from main import STREAM_TOKEN_PATTERN, env_int, generate_ai_response
+
+MODEL_FIRST_TOKEN_DELAY_MS = env_int("MODEL_FIRST_TOKEN_DELAY_MS", 0)
+MODEL_TOKEN_DELAY_MS = env_int("MODEL_TOKEN_DELAY_MS", 20)
+
+app = FastAPI(title="MTBI model server stand-in")
+
+
+class GenerateRequest(BaseModel):
+    message: str
+    personality_type: Optional[str] = None
+
+
+async def tokens(request: GenerateRequest) -> AsyncIterator[str]:
+    await asyncio.sleep(MODEL_FIRST_TOKEN_DELAY_MS / 1000)
+    for index, token in enumerate(STREAM_TOKEN_PATTERN.findall(generate_ai_response(request.message, request.personality_type))):
+        if index:
+            await asyncio.sleep(MODEL_TOKEN_DELAY_MS / 1000)
+        yield json.dumps({"text": token}, ensure_ascii=False) + "\n"
+
+
+@app.post("/generate")
+async def generate(request: GenerateRequest):
+    return StreamingResponse(tokens(request), media_type="application/x-ndjson")
@@ -0,0 +1,78 @@
+"""``score_answer_matrix`` agrees with ``calculate_mtbi_type`` on every answer sheet."""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import main
+
+BANK = main.QuestionBank.build(0, [SimpleNamespace(**row) for row in main.DEFAULT_QUESTIONS])
+WEIGHTS = BANK.trait_weights
+QUESTION_IDS = list(WEIGHTS.question_ids)
+
+
+def scalar_scores(sheet):
+    answers = [main.QuestionAnswer(**answer) for answer in sheet]
+    return main.calculate_mtbi_type(answers, BANK.questions_by_id)
+
+
+def assert_matches_scalar(sheets):
+    trait_scores, personality_types = main.score_answer_matrix(WEIGHTS.answer_matrix(sheets), WEIGHTS)
+    for sheet, scores, personality_type in zip(sheets, trait_scores, personality_types):
+        expected = scalar_scores(sheet)
+        assert main.trait_scores_to_dict(scores) == expected["trait_scores"], sheet
+        assert personality_type == expected["personality_type"], sheet
+
+
+def test_random_sheets_match_scalar_scorer():
+    rng = np.random.default_rng(0)
+    sheets = []
+    for _ in range(5_000):
+        answered = rng.permutation(QUESTION_IDS)[: rng.integers(0, len(QUESTION_IDS) + 1)]
+        sheets.append([{"question_id": int(question_id), "answer": int(rng.integers(1, 6))} for question_id in answered])
+    assert_matches_scalar(sheets)
+
+
+@pytest.mark.parametrize("answer", [1, 2, 3, 4, 5])
+def test_uniform_sheets_match_scalar_scorer(answer):
+    assert_matches_scalar([[{"question_id": question_id, "answer": answer} for question_id in QUESTION_IDS]])
+
+
+def test_empty_sheet_ties_to_primary_traits():
+    trait_scores, personality_types = main.score_answer_matrix(WEIGHTS.answer_matrix([[]]), WEIGHTS)
+
+    assert main.trait_scores_to_dict(trait_scores[0]) == main.empty_trait_scores()
+    assert personality_types[0] == "ESTJ" == scalar_scores([])["personality_type"]
+
+
+def lean(question, trait, points):
+    """Answer that gives ``trait`` exactly ``points`` points."""
+    answer = 3 + points if question.trait_high == trait else 3 - points
+    return {"question_id": question.id, "answer": answer}
+
+
+def test_every_tie_pattern_matches_scalar_scorer():
+    # Per pair, bit 0 is a 2-2 tie and bit 1 lets the secondary trait win 2-1.
+    by_dimension = {}
+    for question in BANK.questions:
+        by_dimension.setdefault(question.dimension, []).append(question)
+    sheets = []
+    for pattern in range(16):
+        sheet = []
+        for bit, (primary, secondary) in enumerate(main.TRAIT_PAIRS):
+            first, second, third = by_dimension[f"{primary}/{secondary}"]
+            secondary_wins = pattern >> (3 - bit) & 1
+            sheet += [lean(first, primary, 1 if secondary_wins else 2), lean(second, secondary, 2), lean(third, primary, 0)]
+        sheets.append(sheet)
+    assert_matches_scalar(sheets)
+
+    _, personality_types = main.score_answer_matrix(WEIGHTS.answer_matrix(sheets), WEIGHTS)
+    assert personality_types[0] == "ESTJ"
+    assert personality_types[15] == "INFP"
+
+
+def test_empty_batch():
+    trait_scores, personality_types = main.score_answer_matrix(WEIGHTS.answer_matrix([]), WEIGHTS)
+
+    assert trait_scores.shape == (0, len(main.TRAIT_ORDER))
+    assert personality_types.shape == (0,)
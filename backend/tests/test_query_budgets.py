@@ -0,0 +1,65 @@
+"""
+SQL statements per endpoint stay within ``QUERY_BUDGETS``.
+
+Runs the same in-process counter as ``python bench.py query-counts``. Needs the
+Postgres at DATABASE_URL, which is migrated and seeded first; skipped when the
+variable is unset (so a developer database is never touched by accident) or no
+database answers.
+"""
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+import main
+from bench import QUERY_BUDGETS, measure_query_counts
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SHARED_TIER_LABELS = {label for label in QUERY_BUDGETS if label.endswith("(shared tier)")}
+
+
+async def seed_questions() -> None:
+    async with main.AsyncSessionLocal() as session:
+        await main.seed_questions(session)
+    await main.async_engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def migrated_database() -> None:
+    if not os.getenv("DATABASE_URL"):
+        pytest.skip("DATABASE_URL is not set")
+    try:
+        with main.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError:
+        pytest.skip("no database at DATABASE_URL")
+
+    # alembic.ini is resolved against the working directory.
+    previous = os.getcwd()
+    os.chdir(BACKEND_DIR)
+    try:
+        main.run_alembic_migrations()
+    finally:
+        os.chdir(previous)
+    asyncio.run(seed_questions())
+
+
+@pytest.fixture(scope="module")
+def counts(migrated_database) -> dict:
+    return asyncio.run(measure_query_counts())
+
+
+def test_every_endpoint_is_measured(counts) -> None:
+    assert set(QUERY_BUDGETS) - SHARED_TIER_LABELS <= set(counts)
+
+
+def test_every_endpoint_within_budget(counts) -> None:
+    over_budget = {
+        label: (count, QUERY_BUDGETS[label])
+        for label, count in counts.items()
+        if count > QUERY_BUDGETS[label]
+    }
+    assert not over_budget, f"statements over budget (measured, budget): {over_budget}"
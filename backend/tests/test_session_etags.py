@@ -0,0 +1,84 @@
+"""The in-place answer path and the full path agree on every If-Match header."""
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+import main
+
+BANK = main.QuestionBank.build(0, [SimpleNamespace(**row) for row in main.DEFAULT_QUESTIONS])
+
+HEADERS = [
+    '"3"',
+    ' "3" ',
+    "3",
+    "W/\"3\"",
+    '"03"',
+    '"+3"',
+    '"3.0"',
+    '"-3"',
+    '"³"',
+    '""',
+    '"',
+    '"3", "4"',
+    '"4", "3"',
+    "*",
+    '"abc"',
+    "",
+]
+
+
+def session(version: int) -> SimpleNamespace:
+    question_ids = [question["id"] for question in main.DEFAULT_QUESTIONS]
+    return SimpleNamespace(
+        id=1,
+        user_id=1,
+        status="in_progress",
+        version=version,
+        current_index=1,
+        question_order=question_ids,
+        answers=[{"question_id": question_ids[0], "answer": 4}],
+        trait_scores={"E": 2, "I": 0},
+        completed_at=None,
+        test_result_id=None,
+    )
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [('"3"', 3), (' "3" ', 3), ('"0"', 0), ("3", None), ('W/"3"', None), ('"03"', None), ('"+3"', None),
+     ('"³"', None), ('""', None), ('"3", "4"', None), ("*", None), ('"abc"', None)],
+)
+def test_parse_session_etag(header, expected):
+    assert main.parse_session_etag(header) == expected
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [('"3"', True), ('"4", "3"', True), ("*", True), ("3", False), ('W/"3"', False), ('"03"', False),
+     ('"4"', False), ("", False), (None, False)],
+)
+def test_etag_matches_strong(header, expected):
+    assert main.etag_matches_strong(header, '"3"') is expected
+
+
+def test_weak_current_etag_never_matches():
+    assert not main.etag_matches_strong('W/"3"', 'W/"3"')
+
+
+@pytest.mark.parametrize("header", HEADERS)
+def test_fast_path_agrees_with_full_path(header):
+    expected_version = main.parse_session_etag(header)
+    for version in range(12):
+        full_path_accepts = main.etag_matches_strong(header, main.session_etag(session(version)))
+        if expected_version is not None:
+            assert (expected_version == version) is full_path_accepts, (header, version)
+
+
+@pytest.mark.parametrize("version", [0, 3, 41])
+def test_compact_version_is_accepted_as_if_match(version):
+    response = main.render_session_delta(session(version), BANK)
+    echoed = orjson.loads(response.body)["version"]
+    assert echoed == response.headers["etag"]
+    assert main.parse_session_etag(echoed) == version
+    assert main.etag_matches_strong(echoed, response.headers["etag"])
@@ -8,7 +8,9 @@ CREATE TABLE IF NOT EXISTS users (
     id SERIAL PRIMARY KEY,
     name VARCHAR(255) NOT NULL,
     email VARCHAR(255) UNIQUE NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    latest_personality_type VARCHAR(255),
+    latest_result_at TIMESTAMP
 );
 
 -- Create questions table
@@ -25,8 +27,9 @@ CREATE TABLE IF NOT EXISTS test_results (
     id SERIAL PRIMARY KEY,
     user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
     personality_type VARCHAR(4) NOT NULL,
-    answers TEXT NOT NULL,
-    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    answers JSONB NOT NULL,
+    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    session_id INTEGER
 );
 
 -- Create test_sessions table
@@ -35,12 +38,16 @@ CREATE TABLE IF NOT EXISTS test_sessions (
     user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
     status VARCHAR(20) NOT NULL DEFAULT 'in_progress',
     current_index INTEGER NOT NULL DEFAULT 0,
-    answers TEXT NOT NULL DEFAULT '[]',
-    question_order TEXT NOT NULL,
+    answers JSONB NOT NULL DEFAULT '[]'::jsonb,
+    question_order JSONB NOT NULL,
+    trait_scores JSONB NULL,
+    trait_scores_digest VARCHAR(64) NULL,
     test_result_id INTEGER REFERENCES test_results(id) ON DELETE SET NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    completed_at TIMESTAMP NULL
+    completed_at TIMESTAMP NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    last_answer_key VARCHAR(255) NULL
 );
 
 -- Create chat_messages table
@@ -52,12 +59,22 @@ CREATE TABLE IF NOT EXISTS chat_messages (
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Create app_metadata table (e.g. the content hash of the seeded question bank)
+CREATE TABLE IF NOT EXISTS app_metadata (
+    key VARCHAR(255) PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_questions_dimension ON questions(dimension);
 CREATE INDEX IF NOT EXISTS idx_test_results_user_id ON test_results(user_id);
 CREATE INDEX IF NOT EXISTS idx_test_results_completed_at ON test_results(completed_at);
+CREATE INDEX IF NOT EXISTS ix_test_results_user_completed_at ON test_results(user_id, completed_at DESC);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_test_results_session_id ON test_results(session_id);
 CREATE INDEX IF NOT EXISTS idx_chat_messages_user_id ON chat_messages(user_id);
 CREATE INDEX IF NOT EXISTS idx_chat_messages_timestamp ON chat_messages(timestamp);
+CREATE INDEX IF NOT EXISTS ix_chat_messages_user_timestamp_id ON chat_messages(user_id, timestamp, id);
 CREATE INDEX IF NOT EXISTS idx_test_sessions_user_id ON test_sessions(user_id);
 CREATE INDEX IF NOT EXISTS idx_test_sessions_status ON test_sessions(status);
 